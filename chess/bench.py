@@ -0,0 +1,225 @@
+# Copyright (c) 2015 Gamda Software, LLC
+#
+# See the file LICENSE.txt for copying permission.
+
+"""Microbenchmarks for the move generation hot paths.
+
+Run with 'python -m chess.bench'. Every benchmark is timed over a fixed
+corpus of games and positions and reported as JSON with operations per
+second ('ops_per_sec') and the peak traced memory in bytes during one call
+('peak_bytes_per_call', measured with tracemalloc; it is not a count of
+allocations). Results can be saved and later compared against as a
+baseline; benchmarks slower or using more memory than the baseline by
+more than the threshold are reported as regressions and make the command
+exit with status 1.
+
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from gameboard.gameboard import Coordinate
+from chess.chess import Chess
+from chess.piece import Pawn, Knight, Bishop, Rook, Queen, King
+
+CORPUS = [
+    "e2e4 e7e5 g1f3 b8c6 f1b5 a7a6 b5c6 d7c6 d2d4 e5d4 d1d4 d8d4 f3d4",
+    "d2d4 d7d5 c2c4 e7e6 b1c3 g8f6 c1g5 f8e7 e2e3 b8d7 g1f3 c7c6",
+    "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6 b1c3 a7a6 c1e3 e7e5",
+    "c2c4 e7e5 b1c3 g8f6 g2g3 d7d5 c4d5 f6d5 f1g2 d5b6 g1f3 b8c6",
+]
+"""Games as space separated moves of the form origin + destination."""
+
+Benchmark = namedtuple('Benchmark', ['name', 'make_args', 'op'])
+"""make_args() returns the arguments for the next op() call, untimed."""
+
+
+def _parse(game):
+    return [(Coordinate[m[0:2]], Coordinate[m[2:4]]) for m in game.split()]
+
+
+def _position(moves):
+    chess = Chess()
+    for origin, destination in moves:
+        chess.move(origin, destination)
+    return chess
+
+
+def _positions():
+    """Return a Chess for every prefix of every game in the corpus."""
+    positions = []
+    for game in CORPUS:
+        moves = _parse(game)
+        for i in range(len(moves) + 1):
+            positions.append(_position(moves[:i]))
+    return positions
+
+
+def _piece_benchmarks(positions):
+    benchmarks = []
+    for cls in [Pawn, Knight, Bishop, Rook, Queen, King]:
+        cases = [(piece, chess.board, coordinate)
+                 for chess in positions
+                 for coordinate, piece in chess.pieces.items()
+                 if type(piece) is cls]
+        for method in ['valid_moves', 'squares_attacked']:
+            op = getattr(cls, method)
+            try:
+                for args in cases:
+                    op(*args)
+            except NotImplementedError:
+                continue
+            benchmarks.append(Benchmark(cls.__name__ + '.' + method,
+                                        itertools.cycle(cases).__next__,
+                                        op))
+    return benchmarks
+
+
+def benchmarks():
+    """Return the list of Benchmark to run."""
+    games = [_parse(game) for game in CORPUS]
+    positions = _positions()
+    move_cases = itertools.cycle([(moves[:i], moves[i])
+                                  for moves in games
+                                  for i in range(len(moves))])
+
+    def make_move_args():
+        prefix, move = next(move_cases)
+        return (_position(prefix),) + move
+
+    def replay(moves):
+        chess = Chess()
+        for origin, destination in moves:
+            chess.move(origin, destination)
+
+    chess = Chess()
+    return [
+        Benchmark('Chess.reset', lambda: (chess,), Chess.reset),
+        Benchmark('Chess.move', make_move_args, Chess.move),
+        Benchmark('Chess.__str__',
+                  itertools.cycle([(p,) for p in positions]).__next__,
+                  Chess.__str__),
+    ] + _piece_benchmarks(positions) + [
+        Benchmark('replay', itertools.cycle([(g,) for g in games]).__next__,
+                  replay),
+    ]
+
+
+def _ops_per_second(benchmark, min_time, repeat):
+    best = 0.0
+    for _ in range(repeat):
+        calls = 0
+        elapsed = 0.0
+        while elapsed < min_time:
+            args = benchmark.make_args()
+            start = time.perf_counter()
+            benchmark.op(*args)
+            elapsed += time.perf_counter() - start
+            calls += 1
+        best = max(best, calls / elapsed if elapsed > 0 else 0.0)
+    return best
+
+
+def _peak_bytes_per_call(benchmark, calls):
+    total = 0
+    for _ in range(calls):
+        args = benchmark.make_args()
+        # restarting clears the traces so the peak only covers this call
+        tracemalloc.start()
+        try:
+            benchmark.op(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        total += peak
+    return total // calls
+
+
+def run(min_time=0.2, repeat=3, trace_calls=20):
+    """Run every benchmark.
+
+    Args:
+        min_time (float): seconds spent timing each benchmark per repeat
+        repeat (int): timings per benchmark, the fastest one is reported
+        trace_calls (int): calls traced to measure peak memory
+    Returns:
+        dict: results ready to be dumped as JSON
+
+    """
+    results = {}
+    for benchmark in benchmarks():
+        results[benchmark.name] = {
+            'ops_per_sec': _ops_per_second(benchmark, min_time, repeat),
+            'peak_bytes_per_call': _peak_bytes_per_call(benchmark,
+                                                        trace_calls),
+        }
+    return {'python': platform.python_version(), 'benchmarks': results}
+
+
+def compare(results, baseline, threshold=0.1):
+    """Return the benchmarks that regressed against baseline.
+
+    A benchmark regresses when its ops/sec drop below 1 - threshold times
+    the baseline, or its peak bytes per call rise above 1 + threshold times
+    the baseline. Metrics missing from either side, or zero in the
+    baseline, are not compared.
+
+    Args:
+        results (dict): output of run()
+        baseline (dict): output of an earlier run()
+        threshold (float): allowed change, 0.1 allows 10% fewer ops/sec and
+            10% more peak bytes per call
+    Returns:
+        dict: benchmark name to a dict of metric name to ratio of current
+        over baseline, for every metric that regressed.
+
+    """
+    regressions = {}
+    for name, result in results['benchmarks'].items():
+        base = baseline['benchmarks'].get(name, {})
+        for metric, worse in [('ops_per_sec',
+                               lambda ratio: ratio < 1 - threshold),
+                              ('peak_bytes_per_call',
+                               lambda ratio: ratio > 1 + threshold)]:
+            if not base.get(metric) or metric not in result:
+                continue
+            ratio = result[metric] / base[metric]
+            if worse(ratio):
+                regressions.setdefault(name, {})[metric] = ratio
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m chess.bench',
+                                     description=__doc__.split('\n\n')[0])
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='seconds spent timing each benchmark')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timings per benchmark, the fastest is kept')
+    parser.add_argument('--baseline',
+                        help='JSON file from an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed slowdown against the baseline')
+    parser.add_argument('--output', help='also write the results here')
+    args = parser.parse_args(argv)
+
+    results = run(args.min_time, args.repeat)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        results['regressions'] = compare(results, baseline, args.threshold)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+    return 1 if results.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,9 +3,14 @@
 # See the file LICENSE.txt for copying permission.
 
 from enum import Enum
-from gameboard.gameboard import Gameboard, Coordinate
+from gameboard.gameboard import Gameboard, Coordinate, Direction
 from chess.piece import Color, Type, Pawn, Knight, Bishop, Rook, Queen, King
 
+_DIAGONALS = [Direction.top_right, Direction.btm_right,
+              Direction.btm_left, Direction.top_left]
+_ORTHOGONALS = [Direction.top, Direction.right,
+                Direction.btm, Direction.left]
+
 class Chess:
     """Chess game logic"""
 
@@ -69,6 +74,143 @@ class Chess:
                if piece is not None else \
                set()
 
+    def see(self, origin, destination):
+        """Return the static exchange evaluation of a capture.
+
+        Plays out every capture on destination, starting with the piece at
+        origin and always recapturing with the least valuable attacker.
+        Sliding pieces hidden behind an attacker join the exchange once the
+        attacker in front of them has captured (x-rays). Either side may
+        stop capturing when continuing would lose material.
+
+        Args:
+            origin (Coordinate): the square of the piece that captures first
+            destination (Coordinate): the square where the exchange happens
+        Returns:
+            int: material won (positive) or lost (negative) by the side
+            moving from origin, in pawn units.
+        Raises:
+            TypeError: if origin or destination is not Coordinate
+            ValueError: if there is no piece at origin, or destination
+                holds a piece of the same color
+
+        """
+        if not isinstance(origin, Coordinate) or \
+           not isinstance(destination, Coordinate):
+            raise TypeError("coordinate variable must be from Coordinate enum")
+        piece = self._pieces.get(origin)
+        if piece is None:
+            raise ValueError("There is no piece at origin")
+        target = self._pieces.get(destination)
+        if target is not None and target.color is piece.color:
+            raise ValueError("A piece can't capture a piece of its own color")
+        gain = [_type_to_value(target.type) if target is not None else 0]
+        value_on_square = _type_to_value(piece.type)
+        removed = {origin}
+        color = _opponent(piece.color)
+        while True:
+            attacker = self._least_valuable_attacker(destination, color,
+                                                     removed)
+            if attacker is None:
+                break
+            attacker_piece = self._pieces[attacker]
+            # the king can't recapture into a square that is still defended
+            if attacker_piece.type is Type.KING and \
+               self._least_valuable_attacker(destination, _opponent(color),
+                                             removed | {attacker}) is not None:
+                break
+            gain.append(value_on_square - gain[-1])
+            value_on_square = _type_to_value(attacker_piece.type)
+            removed.add(attacker)
+            color = _opponent(color)
+        for i in range(len(gain) - 1, 0, -1):
+            gain[i-1] = -max(-gain[i-1], gain[i])
+        return gain[0]
+
+    def king_attacked_after_move(self, origin, destination):
+        """Return True if a move would leave its own king attacked.
+
+        The move is not played and the game state is left unchanged.
+
+        Args:
+            origin (Coordinate): the square where the piece is currently
+            destination (Coordinate): the square where the piece would end
+        Returns:
+            bool: True if the king of the moving piece's color is attacked
+            after the move, False otherwise or if that king is not on the
+            board.
+        Raises:
+            TypeError: if origin or destination is not Coordinate
+            ValueError: if there is no piece at origin
+
+        """
+        if not isinstance(origin, Coordinate) or \
+           not isinstance(destination, Coordinate):
+            raise TypeError("coordinate variable must be from Coordinate enum")
+        piece = self._pieces.get(origin)
+        if piece is None:
+            raise ValueError("There is no piece at origin")
+        captured = self._pieces.get(destination)
+        # attackers only depend on self._pieces, so the board is left alone
+        self._pieces[destination] = piece
+        del self._pieces[origin]
+        try:
+            kings = [c for c, p in self._pieces.items()
+                     if p.type is Type.KING and p.color is piece.color]
+            return any(self._attackers(k, _opponent(piece.color), set())
+                       for k in kings)
+        finally:
+            self._pieces[origin] = piece
+            if captured is not None:
+                self._pieces[destination] = captured
+            else:
+                del self._pieces[destination]
+
+    def _attackers(self, coordinate, color, removed):
+        """Return the squares of pieces of color attacking coordinate.
+
+        Squares in removed are treated as empty, which exposes the sliding
+        pieces behind them.
+
+        """
+        board = self._board
+        attackers = set()
+
+        def add_if(square, types):
+            piece = self._pieces.get(square)
+            if piece is not None and piece.color is color \
+               and piece.type in types:
+                attackers.add(square)
+
+        # a pawn attacks coordinate from where an opposite pawn would attack
+        for s in Pawn(_opponent(color)).squares_attacked(board, coordinate):
+            if s not in removed:
+                add_if(s, (Type.PAWN,))
+        # knight moves are symmetric
+        for s in Knight(color).squares_attacked(board, coordinate):
+            if s not in removed:
+                add_if(s, (Type.KNIGHT,))
+        for directions, sliders in [(_DIAGONALS, (Type.BISHOP, Type.QUEEN)),
+                                    (_ORTHOGONALS, (Type.ROOK, Type.QUEEN))]:
+            for d in directions:
+                square = board.neighbor_in_direction(coordinate, d)
+                distance = 1
+                while square is not None:
+                    if square not in removed and square in self._pieces:
+                        add_if(square, sliders + ((Type.KING,)
+                                                  if distance == 1 else ()))
+                        break
+                    square = board.neighbor_in_direction(square, d)
+                    distance += 1
+        return attackers
+
+    def _least_valuable_attacker(self, coordinate, color, removed):
+        attackers = self._attackers(coordinate, color, removed)
+        if not attackers:
+            return None
+        return min(attackers,
+                   key=lambda s: _type_to_value(self._pieces[s].type))
+
     def move(self, origin, destination):
         """Perform the requested move and returns a Move_Type
 
@@ -127,4 +269,22 @@ class Chess:
                 piece = self._pieces[s] if not self._board.is_empty(s) else "."
                 string = string + str(piece) + '\t'
             string = string + '\n'
-        return string
\ No newline at end of file
+        return string
+
+def _opponent(color):
+    return Color.BLACK if color is Color.WHITE else Color.WHITE
+
+def _type_to_value(t):
+    if t == Type.PAWN:
+        return 1
+    elif t == Type.KNIGHT:
+        return 3
+    elif t == Type.BISHOP:
+        return 3
+    elif t == Type.ROOK:
+        return 5
+    elif t == Type.QUEEN:
+        return 9
+    elif t == Type.KING:
+        return 100
+    return 0
@@ -5,7 +5,6 @@
 from abc import ABCMeta, abstractmethod
 from enum import Enum
 from gameboard.gameboard import Gameboard, Coordinate, Direction
-from gameboard.gameboard import SHIFT_LETTER, SHIFT_SQUARE
 
 class Type(Enum):
     PAWN = 0
@@ -110,10 +109,11 @@ class Pawn(Abstract_Piece):
                             if self.color == Color.WHITE else \
                             Direction.btm
         first = board.neighbor_in_direction(position, forward_direction)
-        if board.is_empty(first):
+        if first is not None and board.is_empty(first):
             moves.add(first)
             second = board.neighbor_in_direction(first, forward_direction)
-            if board.is_empty(second) and not self.has_moved:
+            if second is not None and board.is_empty(second) \
+               and not self.has_moved:
                 moves.add(second)
         return moves
 
@@ -141,8 +141,8 @@ class Pawn(Abstract_Piece):
             return set() 
         moves = set()
         forward = Direction.top if self.color == Color.WHITE else Direction.btm
-        left = Coordinate(position - SHIFT_LETTER)
-        right = Coordinate(position + SHIFT_LETTER)
+        left = board.neighbor_in_direction(position, Direction.left)
+        right = board.neighbor_in_direction(position, Direction.right)
         side_squares = [left, right]
         for s in side_squares:
             if last_move_destination == s:
@@ -0,0 +1,249 @@
+# Copyright (c) 2015 Gamda Software, LLC
+#
+# See the file LICENSE.txt for copying permission.
+
+"""Self-play load generator.
+
+Run with 'python -m chess.selfplay'. Plays games with a random or a
+lightweight policy across a pool of processes and reports, as JSON, moves
+per second, p50/p99 latency of Chess.move() and of move queries, and the
+peak RSS of every worker sampled after each game. Game i is played with
+a random.Random seeded with seed + i, so the same seed replays the same
+games whatever the number of processes. Games can be dumped as JSON lines
+and read back with load_games().
+
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from gameboard.gameboard import Coordinate
+from chess.chess import Chess
+from chess.piece import Color
+from chess.validate import legal_moves_for_piece_at_coordinate
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+POLICIES = ['random', 'capture']
+
+
+def _candidate_moves(chess, color, query_latencies):
+    moves = []
+    for origin, piece in list(chess.pieces.items()):
+        if piece.color is not color:
+            continue
+        start = time.perf_counter()
+        try:
+            destinations = legal_moves_for_piece_at_coordinate(chess, origin)
+        except NotImplementedError:
+            continue
+        query_latencies.append(time.perf_counter() - start)
+        moves.extend((origin, d)
+                     for d in sorted(destinations, key=lambda c: c.value))
+    return moves
+
+
+def _choose(chess, moves, policy, rng):
+    if policy == 'capture':
+        captures = [(chess.see(o, d), o, d) for o, d in moves
+                    if d in chess.pieces]
+        if captures:
+            best = max(score for score, _, _ in captures)
+            if best >= 0:
+                return rng.choice([(o, d) for score, o, d in captures
+                                   if score == best])
+    return rng.choice(moves)
+
+
+def play_game(rng, policy='random', max_moves=200,
+              move_latencies=None, query_latencies=None):
+    """Play one game against itself.
+
+    Only legal moves, as defined by chess.validate.is_legal_move(), are
+    played. A move query is one call to
+    chess.validate.legal_moves_for_piece_at_coordinate(). The game ends when the side to move has no legal moves or
+    after max_moves moves.
+
+    Args:
+        rng (random.Random): source of every choice made
+        policy (str): 'random' picks any move, 'capture' prefers the best
+            capture by Chess.see() unless it loses material
+        max_moves (int): maximum number of moves in the game
+        move_latencies (list): if given, seconds spent in each Chess.move()
+            are appended
+        query_latencies (list): if given, seconds spent in each move query
+            are appended
+    Returns:
+        List of tuples of the form (origin, destination), both Coordinate.
+
+    """
+    if policy not in POLICIES:
+        raise ValueError("policy must be one of " + ", ".join(POLICIES))
+    move_latencies = move_latencies if move_latencies is not None else []
+    query_latencies = query_latencies if query_latencies is not None else []
+    chess = Chess()
+    color = Color.WHITE
+    for _ in range(max_moves):
+        moves = _candidate_moves(chess, color, query_latencies)
+        if not moves:
+            break
+        origin, destination = _choose(chess, moves, policy, rng)
+        start = time.perf_counter()
+        chess.move(origin, destination)
+        move_latencies.append(time.perf_counter() - start)
+        color = Color.BLACK if color is Color.WHITE else Color.WHITE
+    return list(chess.moves)
+
+
+def _max_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _play_chunk(args):
+    indexes, seed, policy, max_moves, started = args
+    games = []
+    move_latencies = []
+    query_latencies = []
+    rss = []
+    for i in indexes:
+        rng = random.Random(seed + i)
+        games.append(play_game(rng, policy, max_moves,
+                               move_latencies, query_latencies))
+        rss.append((time.time() - started, os.getpid(), _max_rss_kb()))
+    return games, move_latencies, query_latencies, rss
+
+
+def _percentile(samples, p):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def run(games=100, processes=None, seed=0, policy='random', max_moves=200,
+        chunksize=10):
+    """Play games across a process pool.
+
+    Args:
+        games (int): number of games to play
+        processes (int): number of worker processes. None uses one per CPU,
+            1 plays in the current process.
+        seed (int): game i is played with random.Random(seed + i)
+        policy (str): one of POLICIES
+        max_moves (int): maximum number of moves per game
+        chunksize (int): number of games sent to a worker at a time
+    Returns:
+        tuple: (report, games). report is a dict ready to be dumped as
+        JSON, games holds the moves of every game in seed order.
+    Raises:
+        ValueError: if policy is unknown, or processes or chunksize is
+            less than 1
+
+    """
+    if policy not in POLICIES:
+        raise ValueError("policy must be one of " + ", ".join(POLICIES))
+    if processes is not None and processes < 1:
+        raise ValueError("processes must be at least 1")
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    started = time.time()
+    chunks = [(range(i, min(i + chunksize, games)), seed, policy, max_moves,
+               started)
+              for i in range(0, games, chunksize)]
+    if processes == 1:
+        results = [_play_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_play_chunk, chunks))
+    seconds = time.time() - started
+
+    played = []
+    move_latencies = []
+    query_latencies = []
+    rss = []
+    for chunk_games, moves, queries, samples in results:
+        played.extend(chunk_games)
+        move_latencies.extend(moves)
+        query_latencies.extend(queries)
+        rss.extend(samples)
+    total_moves = sum(len(game) for game in played)
+    report = {
+        'games': len(played),
+        'moves': total_moves,
+        'seconds': seconds,
+        'moves_per_sec': total_moves / seconds if seconds > 0 else 0.0,
+        'move_latency': {'p50': _percentile(move_latencies, 50),
+                         'p99': _percentile(move_latencies, 99)},
+        'query_latency': {'p50': _percentile(query_latencies, 50),
+                          'p99': _percentile(query_latencies, 99)},
+        'peak_rss_kb': [{'seconds': s, 'pid': pid, 'kb': kb}
+                        for s, pid, kb in sorted(rss)],
+    }
+    return report, played
+
+
+def dump_games(games, f, seed=0):
+    """Write games to f, one JSON object per line.
+
+    Args:
+        games (list): games as returned by run()
+        f (file): text stream to write to
+        seed (int): the seed the games were played with
+
+    """
+    for i, game in enumerate(games):
+        moves = [o.name + d.name for o, d in game]
+        f.write(json.dumps({'seed': seed + i, 'moves': moves}) + '\n')
+
+
+def load_games(f):
+    """Return the games written by dump_games().
+
+    The result can be fed to chess.validate.validate_games().
+
+    """
+    games = []
+    for line in f:
+        if line.strip():
+            moves = json.loads(line)['moves']
+            games.append([(Coordinate[m[0:2]], Coordinate[m[2:4]])
+                          for m in moves])
+    return games
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m chess.selfplay',
+                                     description=__doc__.split('\n\n')[0])
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes, defaults to one per CPU')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', choices=POLICIES, default='random')
+    parser.add_argument('--max-moves', type=int, default=200)
+    parser.add_argument('--chunksize', type=int, default=10,
+                        help='games sent to a worker at a time')
+    parser.add_argument('--dump', help='write the games here as JSON lines')
+    args = parser.parse_args(argv)
+
+    report, games = run(args.games, args.processes, args.seed, args.policy,
+                        args.max_moves, args.chunksize)
+    if args.dump is not None:
+        with open(args.dump, 'w') as f:
+            dump_games(games, f, args.seed)
+    print(json.dumps(report, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,11 +2,18 @@
 #
 # See the file LICENSE.txt for copying permission.
 
+import io
+import time
 import unittest
+from unittest import mock
 from gameboard.gameboard import Coordinate
 from chess.piece import Type as Piece_Type, Color
 from chess.piece import Pawn, Knight, Bishop, Rook, Queen, King
 from chess.chess import Chess
+from chess import bench, selfplay
+from chess.uci import Engine
+from chess.validate import is_legal_move, legal_moves_for_piece_at_coordinate
+from chess.validate import first_illegal_move, validate_games
 
 
 class TestChess(unittest.TestCase):
@@ -173,6 +180,32 @@ class TestChess(unittest.TestCase):
         answer = set([Coordinate.e3])
         self.assertEqual(moves, answer)
 
+    def test_en_passant_edge(self):
+        self._move(Coordinate.a2, Coordinate.a4)
+        self._move(Coordinate.h7, Coordinate.h6)
+        self._move(Coordinate.a4, Coordinate.a5)
+        self._move(Coordinate.b7, Coordinate.b5)
+        moves = self.chess.valid_moves_for_piece_at_coordinate(Coordinate.a5)
+        answer = set([Coordinate.a6, Coordinate.b6])
+        self.assertEqual(moves, answer)
+
+    def test_pawn_valid_moves_last_ranks(self):
+        # seventh rank
+        self._move(Coordinate.a2, Coordinate.a4)
+        self._move(Coordinate.b8, Coordinate.c6)
+        self._move(Coordinate.a4, Coordinate.a5)
+        self._move(Coordinate.h7, Coordinate.h6)
+        self._move(Coordinate.a5, Coordinate.a6)
+        self._move(Coordinate.h6, Coordinate.h5)
+        self._move(Coordinate.a6, Coordinate.b7)
+        moves = self.chess.valid_moves_for_piece_at_coordinate(Coordinate.b7)
+        answer = set([Coordinate.a8, Coordinate.b8, Coordinate.c8])
+        self.assertEqual(moves, answer)
+        # last rank
+        self._move(Coordinate.b7, Coordinate.b8)
+        moves = self.chess.valid_moves_for_piece_at_coordinate(Coordinate.b8)
+        self.assertEqual(moves, set())
+
     def test_pawn_squares_attacked(self):
         # center
         pos = Coordinate.e2
@@ -296,24 +329,242 @@ class TestChess(unittest.TestCase):
 
         self._print()
 
+    def test_see(self):
+        # pawn takes pawn, queen recaptures
+        self._move(Coordinate.e2, Coordinate.e4)
+        self._move(Coordinate.d7, Coordinate.d5)
+        self.assertEqual(self.chess.see(Coordinate.e4, Coordinate.d5), 0)
+        # the knight wins the queen that recaptured
+        self._move(Coordinate.b1, Coordinate.c3)
+        self.assertEqual(self.chess.see(Coordinate.e4, Coordinate.d5), 1)
+        # no capture without a piece at origin
+        self.assertRaises(ValueError, self.chess.see,
+                          Coordinate.d4, Coordinate.d5)
+        self.assertRaises(TypeError, self.chess.see, 0, Coordinate.d5)
+        # no capture of a piece of the same color
+        self.assertRaises(ValueError, self.chess.see,
+                          Coordinate.d1, Coordinate.d2)
+
+    def test_see_x_ray(self):
+        # rook takes defended pawn
+        self._move(Coordinate.d7, Coordinate.d5)
+        self._move(Coordinate.a1, Coordinate.d3)
+        self.assertEqual(self.chess.see(Coordinate.d3, Coordinate.d5), -4)
+        # queen x-rays through the rook once the d-file is open
+        self._move(Coordinate.d2, Coordinate.h3)
+        self.assertEqual(self.chess.see(Coordinate.d3, Coordinate.d5), 1)
 
 
+class TestValidate(unittest.TestCase):
 
+    def setUp(self):
+        self.legal = [(Coordinate.e2, Coordinate.e4),
+                      (Coordinate.e7, Coordinate.e5),
+                      (Coordinate.g1, Coordinate.f3),
+                      (Coordinate.b8, Coordinate.c6),
+                      (Coordinate.f1, Coordinate.b5)]
+
+    def test_first_illegal_move(self):
+        self.assertEqual(first_illegal_move(self.legal), None)
+        # black can't move first
+        game = [(Coordinate.e7, Coordinate.e5)]
+        self.assertEqual(first_illegal_move(game), 0)
+        # empty origin
+        game = [(Coordinate.e2, Coordinate.e4), (Coordinate.e2, Coordinate.e4)]
+        self.assertEqual(first_illegal_move(game), 1)
+        # destination not in valid moves
+        game = self.legal[:2] + [(Coordinate.e4, Coordinate.e6)]
+        self.assertEqual(first_illegal_move(game), 2)
+        # malformed move
+        game = self.legal[:1] + [(Coordinate.e7,)]
+        self.assertEqual(first_illegal_move(game), 1)
+        # stops at the first illegal move
+        game = [(Coordinate.a2, Coordinate.a5)] + self.legal
+        self.assertEqual(first_illegal_move(game), 0)
+
+    def _game(self, moves):
+        return [(Coordinate[m[0:2]], Coordinate[m[2:4]]) for m in moves.split()]
+
+    def test_king_safety(self):
+        # ignoring a check
+        game = self._game("e2e4 d7d6 f1b5 a7a6")
+        self.assertEqual(first_illegal_move(game), 3)
+        game = self._game("e2e4 d7d6 f1b5 c7c6")
+        self.assertEqual(first_illegal_move(game), None)
+        # ignoring a knight check, then capturing the king
+        game = self._game("g1f3 g8h6 f3e5 a7a6 e5g4 a6a5 g4f6 a5a4 f6e8")
+        self.assertEqual(first_illegal_move(game), 7)
+        chess = Chess()
+        for origin, destination in game[:8]:
+            chess.move(origin, destination)
+        self.assertFalse(is_legal_move(chess, Coordinate.f6, Coordinate.e8))
+        # the gamestate is left unchanged
+        chess = Chess()
+        for origin, destination in self._game("e2e4 d7d6 f1b5"):
+            chess.move(origin, destination)
+        pieces = dict(chess.pieces)
+        self.assertFalse(is_legal_move(chess, Coordinate.a7, Coordinate.a6))
+        self.assertTrue(is_legal_move(chess, Coordinate.b8, Coordinate.d7))
+        self.assertEqual(chess.pieces, pieces)
+        # only the moves that block the check
+        moves = legal_moves_for_piece_at_coordinate(chess, Coordinate.b8)
+        self.assertEqual(moves, set([Coordinate.c6, Coordinate.d7]))
+        # not the side to move
+        moves = legal_moves_for_piece_at_coordinate(chess, Coordinate.g1)
+        self.assertEqual(moves, set())
+
+    def test_en_passant(self):
+        # the pawn taken en passant would stay on the board
+        game = self._game("e2e4 a7a6 e4e5 d7d5 e5d6 d5d4")
+        self.assertEqual(first_illegal_move(game), 4)
+        # the last move was not a two square advance
+        game = self._game("e2e4 d7d6 e4e5 d6d5 e5d6")
+        self.assertEqual(first_illegal_move(game), 4)
+
+    def test_move_generation_bugs_surface(self):
+        with mock.patch.object(Pawn, 'valid_moves',
+                               side_effect=RuntimeError("bug")):
+            self.assertRaises(RuntimeError, first_illegal_move, self.legal)
+
+    def test_validate_games(self):
+        games = [self.legal, [(Coordinate.e7, Coordinate.e5)], []]
+        for processes in [1, 2]:
+            report = validate_games(games, processes=processes, chunksize=1)
+            self.assertEqual(report.results, [None, 0, None])
+            self.assertEqual(report.games, 3)
+            self.assertEqual(report.moves, 6)
+            self.assertTrue(report.moves_per_second >= 0)
+        self.assertRaises(ValueError, validate_games, games, 0)
+
+
+class TestUci(unittest.TestCase):
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    def setUp(self):
+        self.output = io.StringIO()
+        self.engine = Engine(self.output)
+
+    def _lines(self):
+        return self.output.getvalue().splitlines()
+
+    def _bestmove(self):
+        # the search runs in the background
+        for _ in range(500):
+            lines = [l for l in self._lines() if l.startswith("bestmove")]
+            if lines:
+                return lines[-1]
+            time.sleep(0.01)
+        self.fail("no bestmove")
+
+    def test_handshake(self):
+        self.engine.handle("uci")
+        self.assertEqual(self._lines()[-1], "uciok")
+        self.engine.handle("isready")
+        self.assertEqual(self._lines()[-1], "readyok")
+        self.assertFalse(self.engine.handle("quit"))
+
+    def test_position(self):
+        self.engine.handle("position startpos moves e2e4 e7e5")
+        self.assertEqual(self.engine.chess.moves,
+                         [(Coordinate.e2, Coordinate.e4),
+                          (Coordinate.e7, Coordinate.e5)])
+        # continuing the game does not replay it
+        board = self.engine.chess.board
+        self.engine.handle("position startpos moves e2e4 e7e5 g1f3")
+        self.assertIs(self.engine.chess.board, board)
+        self.assertEqual(self.engine.chess.moves[-1],
+                         (Coordinate.g1, Coordinate.f3))
+        # a different game starts over
+        self.engine.handle("position startpos moves d2d4")
+        self.assertEqual(self.engine.chess.moves,
+                         [(Coordinate.d2, Coordinate.d4)])
+        self.engine.handle("position startpos")
+        self.assertEqual(self.engine.chess.moves, [])
+        # illegal moves are reported and not played
+        line = "position startpos moves e2e4 e2e4"
+        self.assertTrue(self.engine.handle(line))
+        self.assertEqual(self._lines()[-1], "info string illegal move e2e4")
+        self.assertEqual(self.engine.chess.moves,
+                         [(Coordinate.e2, Coordinate.e4)])
+
+    def test_go(self):
+        self.engine.handle("position startpos moves e2e4 f7f5")
+        self.engine.handle("go")
+        self.assertEqual(self._bestmove(), "bestmove e4f5")
+
+    def test_go_when_search_fails(self):
+        with mock.patch.object(Pawn, 'valid_moves',
+                               side_effect=RuntimeError("bug")):
+            self.engine.handle("go")
+            self.assertEqual(self._bestmove(), "bestmove 0000")
+        self.assertEqual(self._lines(),
+                         ["info string search failed: RuntimeError('bug')",
+                          "bestmove 0000"])
+
+    def test_ponder(self):
+        self.engine.handle("position startpos moves e2e4 f7f5")
+        self.engine.handle("go ponder")
+        self.engine.handle("isready")
+        self.assertEqual(self._lines(), ["readyok"])
+        self.engine.handle("ponderhit")
+        self.assertEqual(self._bestmove(), "bestmove e4f5")
+
+
+class TestBench(unittest.TestCase):
+
+    def test_run(self):
+        results = bench.run(min_time=0.001, repeat=1, trace_calls=1)
+        for name in ['Chess.reset', 'Chess.move', 'Chess.__str__',
+                     'Pawn.valid_moves', 'Knight.squares_attacked', 'replay']:
+            result = results['benchmarks'][name]
+            self.assertTrue(result['ops_per_sec'] > 0)
+            self.assertTrue(result['peak_bytes_per_call'] >= 0)
+
+    def test_compare(self):
+        baseline = {'benchmarks': {
+            'a': {'ops_per_sec': 100, 'peak_bytes_per_call': 1000},
+            'b': {'ops_per_sec': 100, 'peak_bytes_per_call': 1000},
+            'c': {'ops_per_sec': 100, 'peak_bytes_per_call': 1000}}}
+        results = {'benchmarks': {
+            'a': {'ops_per_sec': 95, 'peak_bytes_per_call': 1050},
+            'b': {'ops_per_sec': 80, 'peak_bytes_per_call': 1000},
+            'c': {'ops_per_sec': 100, 'peak_bytes_per_call': 1200},
+            'd': {'ops_per_sec': 1, 'peak_bytes_per_call': 1}}}
+        self.assertEqual(bench.compare(results, baseline, 0.1),
+                         {'b': {'ops_per_sec': 0.8},
+                          'c': {'peak_bytes_per_call': 1.2}})
+        self.assertEqual(bench.compare(results, baseline, 0.25), {})
+
+
+class TestSelfplay(unittest.TestCase):
+
+    def test_run(self):
+        report, games = selfplay.run(games=3, processes=1, seed=7,
+                                     policy='capture', max_moves=20)
+        self.assertEqual(report['games'], 3)
+        self.assertEqual(report['moves'], sum(len(g) for g in games))
+        self.assertTrue(report['move_latency']['p50'] <= \
+                        report['move_latency']['p99'])
+        self.assertEqual(len(report['peak_rss_kb']), 3)
+        self.assertEqual(validate_games(games, processes=1).results,
+                         [None, None, None])
+        # same seed, same games
+        _, again = selfplay.run(games=3, processes=1, seed=7,
+                                policy='capture', max_moves=20)
+        self.assertEqual(games, again)
+        self.assertRaises(ValueError, selfplay.run, 1, 1, 0, 'best')
+
+    def test_full_length_games(self):
+        for policy in selfplay.POLICIES:
+            report, games = selfplay.run(games=4, processes=1, seed=1,
+                                         policy=policy)
+            self.assertEqual(report['games'], 4)
+            self.assertEqual(validate_games(games, processes=1).results,
+                             [None] * 4)
+
+    def test_dump_and_load(self):
+        _, games = selfplay.run(games=2, processes=1, max_moves=10)
+        f = io.StringIO()
+        selfplay.dump_games(games, f)
+        f.seek(0)
+        self.assertEqual(selfplay.load_games(f), games)
 
@@ -0,0 +1,189 @@
+# Copyright (c) 2015 Gamda Software, LLC
+#
+# See the file LICENSE.txt for copying permission.
+
+"""UCI (Universal Chess Interface) front-end.
+
+Run with 'python -m chess.uci'. Commands are read from stdin and answers
+are written to stdout. Searches run in a background thread so that
+'stop', 'isready' and 'ponderhit' are answered while searching.
+
+"""
+
+import sys
+import threading
+from gameboard.gameboard import Coordinate
+from chess.chess import Chess
+from chess.piece import Color
+from chess.validate import is_legal_move, legal_moves_for_piece_at_coordinate
+
+
+class Engine:
+    """UCI protocol state for one Chess game"""
+
+    name = "chessTDD"
+    author = "Gamda Software"
+
+    @property
+    def chess(self):
+        return self._chess
+
+    def __init__(self, output=sys.stdout):
+        """Return a new engine writing its answers to output.
+
+        Args:
+            output (file): stream receiving the engine's answers
+
+        """
+        self._output = output
+        self._output_lock = threading.Lock()
+        self._chess = Chess()
+        self._thread = None
+        self._stop = threading.Event()
+        self._release = threading.Event()
+        self._infinite = False
+
+    def handle(self, line):
+        """Process one command.
+
+        Args:
+            line (str): a UCI command
+        Returns:
+            bool: False after 'quit', True otherwise
+
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self._write("id name " + self.name)
+            self._write("id author " + self.author)
+            self._write("uciok")
+        elif command == "isready":
+            self._write("readyok")
+        elif command == "ucinewgame":
+            self._stop_search()
+            self._chess.reset()
+        elif command == "position":
+            self._stop_search()
+            self._position(args)
+        elif command == "go":
+            self._stop_search()
+            self._go(args)
+        elif command == "stop":
+            self._stop_search()
+        elif command == "ponderhit":
+            if not self._infinite:
+                self._release.set()
+        elif command == "quit":
+            self._stop_search()
+            return False
+        return True
+
+    def _write(self, line):
+        with self._output_lock:
+            self._output.write(line + "\n")
+            self._output.flush()
+
+    def _position(self, args):
+        if not args or args[0] != "startpos":
+            self._write("info string only 'position startpos' is supported")
+            return
+        try:
+            moves = [_parse_move(m) for m in args[args.index("moves")+1:]] \
+                    if "moves" in args else []
+        except KeyError as e:
+            self._write("info string invalid move " + str(e))
+            return
+        # keep the current game when the new position continues it
+        played = len(self._chess.moves)
+        if self._chess.moves != moves[:played]:
+            self._chess.reset()
+            played = 0
+        for origin, destination in moves[played:]:
+            if not is_legal_move(self._chess, origin, destination):
+                self._write("info string illegal move " +
+                            origin.name + destination.name)
+                return
+            self._chess.move(origin, destination)
+
+    def _go(self, args):
+        ponder = "ponder" in args
+        self._infinite = "infinite" in args
+        self._stop.clear()
+        if ponder or self._infinite:
+            self._release.clear()
+        else:
+            self._release.set()
+        self._thread = threading.Thread(target=self._search, daemon=True)
+        self._thread.start()
+
+    def _stop_search(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._release.set()
+        self._thread.join()
+        self._thread = None
+
+    def _search(self):
+        try:
+            best = _best_move(self._chess, self._stop)
+        except Exception as e:
+            # the GUI waits for bestmove, it must always be sent
+            self._write("info string search failed: " + repr(e))
+            best = None
+        # bestmove waits for 'stop' or 'ponderhit' when pondering
+        self._release.wait()
+        if best is None:
+            self._write("bestmove 0000")
+        else:
+            origin, destination = best
+            self._write("bestmove " + origin.name + destination.name)
+
+
+def _parse_move(move):
+    # promotion suffixes are ignored, pieces do not promote yet
+    return Coordinate[move[0:2]], Coordinate[move[2:4]]
+
+
+def _best_move(chess, stop):
+    """Return the best (origin, destination) for the side to move.
+
+    One ply search over legal moves: captures are scored with Chess.see(),
+    quiet moves score zero. Returns the best move found so far once stop is
+    set, or None if there are no moves.
+
+    """
+    color = Color.WHITE if len(chess.moves) % 2 == 0 else Color.BLACK
+    best = None
+    best_score = None
+    for origin, piece in list(chess.pieces.items()):
+        if piece.color is not color:
+            continue
+        try:
+            destinations = legal_moves_for_piece_at_coordinate(chess, origin)
+        except NotImplementedError:
+            continue
+        for destination in sorted(destinations, key=lambda c: c.value):
+            score = chess.see(origin, destination) \
+                    if destination in chess.pieces else \
+                    0
+            if best_score is None or score > best_score:
+                best = (origin, destination)
+                best_score = score
+        if stop.is_set() and best is not None:
+            break
+    return best
+
+
+def main():
+    engine = Engine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# Copyright (c) 2015 Gamda Software, LLC
+#
+# See the file LICENSE.txt for copying permission.
+
+"""Bulk validation of untrusted games.
+
+A game is a list of tuples of the form (origin, destination), the same
+shape as Chess.moves. Games are replayed move by move and each move is
+checked before it is played, stopping at the first illegal one.
+
+"""
+
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from gameboard.gameboard import Coordinate
+from chess.chess import Chess
+from chess.piece import Color, Type
+
+
+class Report(namedtuple('Report', ['results', 'games', 'moves', 'seconds'])):
+    """Outcome of validate_games().
+
+    results is a list with one entry per game, in the order they were
+    given: None if every move is legal, otherwise the index of the first
+    illegal move. moves counts the moves that were checked.
+
+    """
+
+    @property
+    def games_per_second(self):
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def moves_per_second(self):
+        return self.moves / self.seconds if self.seconds > 0 else 0.0
+
+
+def is_legal_move(chess, origin, destination):
+    """Return True if a move is legal in the current gamestate.
+
+    A move is legal if origin holds a piece of the side to move, destination
+    is one of that piece's valid moves and does not hold a king, and the
+    move does not leave the mover's own king attacked. Only the moving
+    piece's moves are generated.
+
+    Castling, promotion and en passant are not modelled by Chess yet:
+    Chess.move() leaves a pawn taken en passant on the board. En passant
+    captures are reported as illegal, and so are moves of pieces whose
+    move generation is not implemented yet, because neither can be
+    verified.
+
+    Args:
+        chess (Chess): game to check the move in, it is not modified
+        origin (Coordinate): the square where the piece is currently
+        destination (Coordinate): the square where the piece would end
+    Returns:
+        bool: True if the move can be played.
+    Raises:
+        Errors from move generation other than NotImplementedError are not
+        caught, they signal a bug in the library rather than an illegal
+        move.
+
+    """
+    if not isinstance(origin, Coordinate) or \
+       not isinstance(destination, Coordinate):
+        return False
+    piece = chess.pieces.get(origin)
+    if piece is None or piece.color is not _side_to_move(chess):
+        return False
+    try:
+        if destination not in piece.valid_moves(chess.board, origin):
+            return False
+    except NotImplementedError:
+        return False
+    return _is_legal_destination(chess, piece, origin, destination)
+
+
+def legal_moves_for_piece_at_coordinate(chess, coordinate):
+    """Return a set of coordinates where Piece can legally move.
+
+    The piece's valid moves are generated once and then filtered with the
+    rules of is_legal_move().
+
+    Args:
+        chess (Chess): game to check the moves in, it is not modified
+        coordinate (Coordinate): position to check for moves
+    Returns:
+        Set of gameboard.gameboard.Coordinate elements. Returns empty set
+        if there is no piece of the side to move in the given coordinate.
+    Raises:
+        TypeError: if coordinate is not Coordinate
+        NotImplementedError: if the piece's move generation is not
+            implemented yet
+
+    """
+    if not isinstance(coordinate, Coordinate):
+        raise TypeError("coordinate variable must be from Coordinate enum")
+    piece = chess.pieces.get(coordinate)
+    if piece is None or piece.color is not _side_to_move(chess):
+        return set()
+    return {d for d in piece.valid_moves(chess.board, coordinate)
+            if _is_legal_destination(chess, piece, coordinate, d)}
+
+
+def _side_to_move(chess):
+    return Color.WHITE if len(chess.moves) % 2 == 0 else Color.BLACK
+
+
+def _is_legal_destination(chess, piece, origin, destination):
+    """Check a valid move of piece for everything but move generation."""
+    target = chess.pieces.get(destination)
+    if target is not None and target.type is Type.KING:
+        return False
+    # a pawn only moves diagonally onto an empty square en passant
+    if piece.type is Type.PAWN and target is None and \
+       destination in piece.squares_attacked(chess.board, origin):
+        return False
+    return not chess.king_attacked_after_move(origin, destination)
+
+
+def first_illegal_move(moves, chess=None):
+    """Return the index of the first illegal move in a game.
+
+    Each move is checked with is_legal_move() before it is played.
+
+    Args:
+        moves (list): tuples of the form (origin, destination)
+        chess (Chess): game to replay on, it is reset before replaying.
+            A new one is created if None.
+    Returns:
+        int: index of the first illegal move, or None if all are legal.
+
+    """
+    if chess is None:
+        chess = Chess()
+    else:
+        chess.reset()
+    for i, move in enumerate(moves):
+        try:
+            origin, destination = move
+        except (TypeError, ValueError):
+            return i
+        if not is_legal_move(chess, origin, destination):
+            return i
+        chess.move(origin, destination)
+    return None
+
+
+def _validate_chunk(games):
+    chess = Chess()
+    return [first_illegal_move(game, chess) for game in games]
+
+
+def validate_games(games, processes=None, chunksize=64):
+    """Validate many games, spreading them across a process pool.
+
+    Args:
+        games (list): games, each a list of (origin, destination) tuples
+        processes (int): number of worker processes. None uses one per CPU,
+            1 validates in the current process.
+        chunksize (int): number of games sent to a worker at a time
+    Returns:
+        Report: per game results and throughput
+    Raises:
+        ValueError: if processes or chunksize is less than 1
+
+    """
+    if processes is not None and processes < 1:
+        raise ValueError("processes must be at least 1")
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    games = list(games)
+    start = time.perf_counter()
+    if processes == 1:
+        results = _validate_chunk(games)
+    else:
+        chunks = [games[i:i+chunksize]
+                  for i in range(0, len(games), chunksize)]
+        results = []
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for chunk_results in executor.map(_validate_chunk, chunks):
+                results.extend(chunk_results)
+    seconds = time.perf_counter() - start
+    moves = sum(len(game) if result is None else result + 1
+                for game, result in zip(games, results))
+    return Report(results, len(games), moves, seconds)